@@ -1,19 +1,45 @@
 import re
+import aiodns
 import aiohttp
 import asyncio
 import csv
-from urllib.parse import urljoin, unquote
+import functools
+import json
+import socket
+import time
+from html import unescape
+from urllib.parse import urljoin, unquote, urlsplit
+from aiohttp.abc import AbstractResolver
 from tqdm.asyncio import tqdm_asyncio
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from email_validator import validate_email, EmailNotValidError
 
+try:
+    import hyperscan
+except ImportError:  # Not available on every platform; fall back to re
+    hyperscan = None
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows; use the default event loop
+    uvloop = None
+
 # ==================== CONFIGURATION ====================
 DOMAINS_FILE = 'domains.txt'
 OUTPUT_FILE = 'try 1.csv'
+# Append-only log, one JSON result per finished domain, kept across runs.
+# To recover a crashed run, the last line for each line_number is that domain's result.
+PROGRESS_FILE = 'try 1.progress.jsonl'
 TIMEOUT = 15                  # Faster timeout
 CONCURRENCY_LIMIT = 10        # Safe for most systems (was 30 → too much)
-DELAY_BETWEEN_REQUESTS = 0.5  # Be gentle, avoid hammering
 MAX_RETRIES = 2
+DNS_CONCURRENCY = 100         # Parallel lookups during DNS pre-warm
+DNS_CACHE_TTL = 300
+DNS_ATTEMPTS = 2              # Failed lookups before a host is treated as dead
+MAX_BYTES = 2_000_000         # Cap per page body
+CHUNK_SIZE = 65536
+OUTPUT_BUFFER = 1 << 16
+FLUSH_EVERY = 50              # Flush the progress log every N results
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
     'Accept-Language': 'en-US,en;q=0.9',
@@ -22,76 +48,194 @@ HEADERS = {
 
 # Better email regex
 EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+EMAIL_PATTERN_BYTES = EMAIL_PATTERN.pattern.encode()
+
+# Obfuscation replacements, applied in a single regex pass
+CLEANUP_REPLACEMENTS = {
+    '[at]': '@', '(at)': '@', ' at ': '@', ' à ': '@', '＠': '@',
+    '[dot]': '.', '(dot)': '.', ' dot ': '.', '。': '.'
+}
+CLEANUP_RE = re.compile('|'.join(map(re.escape, CLEANUP_REPLACEMENTS)))
+
+# Raw-HTML scanners for email extraction (no DOM needed)
+SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+MAILTO_RE = re.compile(r'href\s*=\s*["\']?mailto:([^"\'\s>]+)', re.I)
+
+# Domain half of EMAIL_PATTERN, for checking mailto values
+DOMAIN_RE = re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Leading scheme on input lines
+STRIP_SCHEME = re.compile(r'^https?://', re.I)
 
+# Link discovery only needs <a href>, so skip building the rest of the tree
+ANCHOR_STRAINER = SoupStrainer('a', href=True)
+KEYWORD_RE = re.compile(r'contact|about|impressum|team|support|privacy|kontakt', re.I)
+
+@functools.lru_cache(maxsize=65536)
 def cleanup_email(email: str) -> str:
     email = unquote(email.lower())
-    replacements = {
-        '[at]': '@', '(at)': '@', ' at ': '@', ' à ': '@', '＠': '@',
-        '[dot]': '.', '(dot)': '.', ' dot ': '.', '。': '.'
-    }
-    for old, new in replacements.items():
-        email = email.replace(old, new)
-    return email.strip()
+    return CLEANUP_RE.sub(lambda m: CLEANUP_REPLACEMENTS[m.group(0)], email).strip()
+
+@functools.lru_cache(maxsize=65536)
+def _valid(email: str) -> bool:
+    try:
+        validate_email(email, check_deliverability=False)
+        return True
+    except EmailNotValidError:
+        return False
+
+def _compile_email_db():
+    if hyperscan is None:
+        return None
+    db = hyperscan.Database()
+    db.compile(expressions=[EMAIL_PATTERN_BYTES], ids=[1], flags=[hyperscan.HS_FLAG_SOM_LEFTMOST])
+    return db
+
+EMAIL_DB = _compile_email_db()
+
+def find_emails(text: str) -> list:
+    if EMAIL_DB is None:
+        return EMAIL_PATTERN.findall(text)
+    
+    # Hyperscan reports every end offset of a match; keep the longest per start
+    # and drop spans overlapping an accepted one, as findall() would. The
+    # per-match Python callback makes this slower than re on text dense with
+    # addresses; it pays off on large pages with few matches.
+    data = text.encode('utf-8')
+    spans = {}
+    def on_match(id, start, end, flags, context):
+        if end > spans.get(start, 0):
+            spans[start] = end
+    EMAIL_DB.scan(data, match_event_handler=on_match)
+    
+    emails = []
+    last_end = 0
+    for start, end in sorted(spans.items()):
+        if start >= last_end:
+            emails.append(data[start:end].decode('ascii'))
+            last_end = end
+    return emails
+
+def _parse(html: str, parse_only=None) -> BeautifulSoup:
+    return BeautifulSoup(html, 'lxml', parse_only=parse_only)
+
+# Read at most MAX_BYTES of the body so one huge page can't hog a slot
+async def read_capped(resp) -> str:
+    body = bytearray()
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        body += chunk
+        if len(body) >= MAX_BYTES:
+            resp.close()
+            break
+    body = bytes(body[:MAX_BYTES])
+    try:
+        return body.decode(resp.charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+# Cheap HEAD probe so error pages, non-HTML and oversized bodies are never downloaded.
+# Error statuses raise like a failed GET; False means the page is definitely not worth fetching.
+async def head_ok(session, url: str) -> bool:
+    async with session.head(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as resp:
+        if resp.status in (405, 501):  # HEAD not supported, let the GET decide
+            return True
+        if resp.status != 200:
+            raise aiohttp.ClientError(f"Status {resp.status}")
+        content_type = resp.headers.get('content-type', '')
+        if content_type and 'html' not in content_type:
+            return False
+        return (resp.content_length or 0) <= MAX_BYTES
 
 async def fetch_page(session, url: str):
     try:
+        if not await head_ok(session, url):
+            return None
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as resp:
             if resp.status == 200:
-                return await resp.text()
+                return await read_capped(resp)
             return None
     except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
         return None
 
+# Decode entities before cutting off ?subject=/#fragment, as BeautifulSoup did
+def mailto_targets(html: str) -> list:
+    targets = []
+    for m in MAILTO_RE.finditer(html):
+        value = unescape(m.group(1)).split('?', 1)[0].split('#', 1)[0]
+        targets.extend(unquote(t) for t in value.split(',') if t.strip())
+    return targets
+
+# Cheap shape check for mailto values: one '@' and a dotted domain
+def _looks_like_email(address: str) -> bool:
+    local, _, domain = address.partition('@')
+    return bool(local) and DOMAIN_RE.fullmatch(domain) is not None
+
+# Returns (text_emails, mailto_emails); well-formed mailto: hits skip validation
 async def extract_emails_from_html(html: str):
     if not html:
-        return []
-    
-    soup = BeautifulSoup(html, 'html.parser')
-    text = soup.get_text(separator=' ')
+        return [], []
     
-    # Find from text
-    found = set(EMAIL_PATTERN.findall(text))
+    # Drop comments and script/style bodies, which BeautifulSoup never returned,
+    # then strip tags and decode entities like get_text() would
+    html = SCRIPT_STYLE_RE.sub(' ', COMMENT_RE.sub(' ', html))
+    text = unescape(TAG_RE.sub(' ', html))
     
     # Find from mailto links
-    for a in soup.find_all('a', href=True):
-        href = a['href'].lower()
-        if href.startswith('mailto:'):
-            email = href[7:].split('?')[0].strip()
-            found.add(unquote(email))
+    mailto_all = set(map(cleanup_email, mailto_targets(html)))
+    mailto = set(filter(_looks_like_email, mailto_all))
     
-    cleaned = [cleanup_email(e) for e in found]
+    # Find from text; malformed mailto values are validated along with these
+    cleaned = (set(map(cleanup_email, set(find_emails(text)))) | mailto_all) - mailto
     
     # Validate
-    valid = []
-    for e in cleaned:
-        try:
-            validate_email(e, check_deliverability=False)
-            valid.append(e)
-        except EmailNotValidError:
-            pass
+    valid = [e for e in cleaned if _valid(e)]
     
-    return list(set(valid))
+    return valid, list(mailto)
 
+# Returns (pages, home_html) so the home page isn't downloaded twice
 async def get_relevant_pages(session, base_url: str):
     html = await fetch_page(session, base_url)
     if not html:
-        return [base_url]
+        return [base_url], None
     
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = _parse(html, parse_only=ANCHOR_STRAINER)
     links = set()
     
     # Priority pages
-    keywords = ['contact', 'about', 'impressum', 'team', 'support', 'privacy', 'kontakt']
     for a in soup.find_all('a', href=True):
-        href = a['href'].lower()
-        if any(k in href for k in keywords):
+        if KEYWORD_RE.search(a['href']):
             full = urljoin(base_url, a['href'])
             links.add(full)
     
     # Add home page
     links.add(base_url)
     
-    return list(links)[:5]  # Max 5 pages per domain
+    return list(links)[:5], html  # Max 5 pages per domain
+
+async def scan_page(session, page_url: str, html=None):
+    for _ in range(MAX_RETRIES + 1):
+        if html is None:
+            html = await fetch_page(session, page_url)
+        if html is not None:
+            text_emails, mailto_emails = await extract_emails_from_html(html)
+            return page_url, mailto_emails + text_emails
+    return page_url, []
+
+async def first_page_with_emails(session, pages, fetched):
+    # Fetch every candidate page at once; stop at the first one with emails
+    tasks = [asyncio.ensure_future(scan_page(session, page_url, fetched.get(page_url)))
+             for page_url in pages]
+    try:
+        for future in asyncio.as_completed(tasks):
+            page_url, emails = await future
+            if emails:
+                return page_url, emails
+    finally:
+        for task in tasks:
+            task.cancel()
+    return '', []
 
 async def check_domain(session, domain: str, line_number: int):
     domain = domain.strip()
@@ -99,33 +243,16 @@ async def check_domain(session, domain: str, line_number: int):
         return {'domain': '', 'emails': 'Not found', 'target_website': '', 'line_number': line_number}
     
     protocols = ['https://', 'http://']
-    all_emails = set()
-    target_website = ''
     
-    for protocol in protocols:
-        if all_emails:
-            break
-        base_url = protocol + domain
-        
-        pages = await get_relevant_pages(session, base_url)
-        
-        for page_url in pages:
-            if all_emails:
-                break
-                
-            for attempt in range(MAX_RETRIES + 1):
-                if all_emails:
-                    break
-                    
-                await asyncio.sleep(DELAY_BETWEEN_REQUESTS)  # Be gentle
-                
-                html = await fetch_page(session, page_url)
-                emails = await extract_emails_from_html(html)
-                
-                if emails:
-                    all_emails.update(emails)
-                    target_website = page_url
-                    break
+    # Discover pages over both protocols concurrently
+    base_urls = [protocol + domain for protocol in protocols]
+    discovered = await asyncio.gather(*(get_relevant_pages(session, base_url)
+                                        for base_url in base_urls))
+    pages = list(dict.fromkeys(page for links, _ in discovered for page in links))
+    fetched = {base_url: html for base_url, (_, html) in zip(base_urls, discovered) if html}
+    
+    target_website, emails = await first_page_with_emails(session, pages, fetched)
+    all_emails = set(emails)
     
     emails_str = ', '.join(sorted(all_emails)) if all_emails else 'Not found'
     
@@ -136,6 +263,55 @@ async def check_domain(session, domain: str, line_number: int):
         'line_number': line_number
     }
 
+class PrewarmedResolver(AbstractResolver):
+    # Async (c-ares) resolver that also serves the connector from the pre-warm
+    # lookups, so live hosts aren't resolved a second time
+
+    def __init__(self):
+        self.resolver = aiohttp.AsyncResolver()
+        self.cache = {}
+
+    async def resolve(self, host, port=0, family=socket.AF_UNSPEC):
+        cached = self.cache.get((host, family))
+        if cached and time.monotonic() - cached[0] < DNS_CACHE_TTL:
+            return [dict(addr, port=port) for addr in cached[1]]
+        addrs = await self.resolver.resolve(host, port, family=family)
+        self.cache[(host, family)] = (time.monotonic(), addrs)
+        return addrs
+
+    async def close(self):
+        await self.resolver.close()
+
+def host_of(domain: str) -> str:
+    return urlsplit('//' + domain).hostname or ''
+
+DNS_NOT_FOUND = (aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA)
+
+async def find_unresolved_hosts(resolver, domains):
+    # Resolve every host once up front so dead domains are skipped before any request
+    sem = asyncio.Semaphore(DNS_CONCURRENCY)
+
+    async def resolves(host):
+        async with sem:
+            for _ in range(DNS_ATTEMPTS):
+                try:
+                    await resolver.resolve(host, 80, family=socket.AF_UNSPEC)
+                    return True
+                except OSError as e:
+                    # Only "no such host / no records" counts; timeouts, SERVFAIL
+                    # etc. are left to the real requests
+                    cause = e.__cause__
+                    if not (isinstance(cause, aiodns.error.DNSError) and cause.args
+                            and cause.args[0] in DNS_NOT_FOUND):
+                        return True
+                except ValueError:
+                    pass
+            return False
+
+    hosts = list({host_of(d) for d in domains} - {''})
+    resolved = await asyncio.gather(*(resolves(h) for h in hosts))
+    return {h for h, ok in zip(hosts, resolved) if not ok}
+
 async def main():
     # Read domains with line numbers
     with open(DOMAINS_FILE, 'r', encoding='utf-8') as f:
@@ -143,55 +319,78 @@ async def main():
     
     domains_with_idx = []
     for idx, line in enumerate(lines):
-        clean_domain = line.replace('http://', '').replace('https://', '').split()[0]
+        clean_domain = STRIP_SCHEME.sub('', line, count=1).split(None, 1)[0]
         domains_with_idx.append((idx + 1, clean_domain))
     
     if not domains_with_idx:
         print("No domains found.")
         return
     
-    # Write header
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['domain', 'emails', 'target_website'])
+    # Async (c-ares) DNS, shared by the pre-warm and the connector
+    resolver = PrewarmedResolver()
+    unresolved = await find_unresolved_hosts(resolver, [d for _, d in domains_with_idx])
     
     # Connector with safe limits
     connector = aiohttp.TCPConnector(
         limit=CONCURRENCY_LIMIT,
         limit_per_host=3,        # Don't hammer same domain
         ssl=False,
-        keepalive_timeout=30
+        keepalive_timeout=30,
+        resolver=resolver,
+        ttl_dns_cache=DNS_CACHE_TTL
     )
     
     timeout = aiohttp.ClientTimeout(total=TIMEOUT)
     sem = asyncio.Semaphore(CONCURRENCY_LIMIT)
     
-    async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
-        tasks = [
-            check_domain(session, domain, line_no)
-            for line_no, domain in domains_with_idx
-        ]
-        
-        results = []
-        for future in tqdm_asyncio.as_completed(tasks, desc="Scraping domains"):
-            result = await future
-            results.append(result)
+    # Log finished domains to a JSONL sidecar so a crashed run keeps its progress;
+    # the CSV itself is written once, in order, at the end
+    with open(PROGRESS_FILE, 'a', buffering=OUTPUT_BUFFER, encoding='utf-8') as progress:
+        async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout,
+                                         read_bufsize=CHUNK_SIZE) as session:
+            # Results are stored column-wise, indexed by line number - 1
+            n = len(domains_with_idx)
+            result_domains = [''] * n
+            result_emails = ['Not found'] * n
+            result_targets = [''] * n
+            
+            # Domains that don't resolve are recorded without any request
+            for line_no, domain in domains_with_idx:
+                if host_of(domain) in unresolved:
+                    result_domains[line_no - 1] = domain
+                    progress.write(json.dumps({'domain': domain, 'emails': 'Not found',
+                                               'target_website': '', 'line_number': line_no}) + '\n')
+            
+            tasks = [
+                check_domain(session, domain, line_no)
+                for line_no, domain in domains_with_idx
+                if host_of(domain) not in unresolved
+            ]
             
-            # Continuously save
-            with open(OUTPUT_FILE, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([result['domain'], result['emails'], result['target_website']])
-    
-    # Final sorted clean write
-    results.sort(key=lambda x: x['line_number'])
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+            for done, future in enumerate(tqdm_asyncio.as_completed(tasks, desc="Scraping domains"), 1):
+                result = await future
+                i = result['line_number'] - 1
+                result_domains[i] = result['domain']
+                result_emails[i] = result['emails']
+                result_targets[i] = result['target_website']
+                
+                progress.write(json.dumps(result) + '\n')
+                if done % FLUSH_EVERY == 0:
+                    progress.flush()
+    
+    # The connector only closes resolvers it created itself
+    await resolver.close()
+    
+    # Rows are already in input order; write the CSV in one pass
+    with open(OUTPUT_FILE, 'w', buffering=OUTPUT_BUFFER, newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['domain', 'emails', 'target_website'])
-        for r in results:
-            writer.writerow([r['domain'], r['emails'], r['target_website']])
+        writer.writerows(zip(result_domains, result_emails, result_targets))
     
     print(f"\nCompleted! Results saved to '{OUTPUT_FILE}'")
-    print(f"   → {len([r for r in results if r['emails'] != 'Not found'])} domains with emails found")
+    print(f"   → {sum(e != 'Not found' for e in result_emails)} domains with emails found")
 
 if __name__ == '__main__':
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
@@ -1,78 +1,247 @@
 import re
+import aiodns
 import aiohttp
 import asyncio
 import csv
-from urllib.parse import urljoin, unquote
+import functools
+import json
+import socket
+import time
+from html import unescape
+from urllib.parse import urljoin, unquote, urlsplit
+from aiohttp.abc import AbstractResolver
 from tqdm.asyncio import tqdm_asyncio
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from email_validator import validate_email
 from playwright.async_api import async_playwright
 
+try:
+    import uvloop
+except ImportError:  # Not available on Windows; use the default event loop
+    uvloop = None
+
 # Configuration
 DOMAINS_FILE = 'domains.txt'
 OUTPUT_FILE = 'try 1.csv'
+# Append-only log, one JSON result per finished domain, kept across runs.
+# To recover a crashed run, the last line for each line_number is that domain's result.
+PROGRESS_FILE = 'try 1.progress.jsonl'
 TIMEOUT = 60
 CONCURRENCY_LIMIT = 30
 MAX_RETRIES = 2
+DNS_CONCURRENCY = 100
+DNS_CACHE_TTL = 300
+DNS_ATTEMPTS = 2
+KEEPALIVE_TIMEOUT = 30
+MAX_BYTES = 2_000_000
+CHUNK_SIZE = 65536
+PLAYWRIGHT_CONTEXTS = 5
+OUTPUT_BUFFER = 1 << 16
+FLUSH_EVERY = 50
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
     'Accept-Language': 'en-US,en;q=0.9'
 }
 
-EMAIL_PATTERN = re.compile(r'''
-    (?:[\w.%+-]+
-    (?:@|\[at\]|\(at\)| at | à | à|＠)
-    [\w-]+
-    (?:\.|\[dot\]|\(dot\)| dot |。)
-    [\w-]+)
-    |
-    [\w.%+-]+@[\w.-]+\.[a-zA-Z]{2,}
-''', re.VERBOSE | re.IGNORECASE)
+# Emails are located by pivoting on '@' after obfuscations have been
+# normalised, which keeps the scan linear instead of backtracking through
+# the obfuscation alternatives at every character.
+OBFUSCATION_TABLE = str.maketrans({'＠': '@', '。': '.'})
+OBFUSCATED_AT = re.compile(r'\[at\]|\(at\)| at | à ?', re.IGNORECASE)
+OBFUSCATED_DOT = re.compile(r'\[dot\]|\(dot\)| dot ', re.IGNORECASE)
+AT_RE = re.compile(r'@')
+LOCAL_RE = re.compile(r'[\w.%+-]{1,64}\Z', re.ASCII)
+LOCAL_PUNCT = '_.%+-'
+DOMAIN_RE = re.compile(r'[\w.-]+\.[a-zA-Z]{2,}', re.ASCII)
+
+# Raw-HTML scanners for email extraction (no DOM needed)
+SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+
+# mailto: targets are read straight from the raw HTML
+MAILTO_RE = re.compile(r'href\s*=\s*["\']?mailto:([^"\'\s>]+)', re.IGNORECASE)
+
+# Applied in a single pass; ' ' stays last so ' at ' / ' dot ' win first
+CLEANUP_REPLACEMENTS = {
+    '[at]': '@', '(at)': '@', ' at ': '@', ' à ': '@', '＠': '@', '&#64;': '@',
+    '&#46;': '.', ' dot ': '.', '。': '.', '[dot]': '.', '(dot)': '.',
+    ' ': '',
+}
+CLEANUP_RE = re.compile('|'.join(map(re.escape, CLEANUP_REPLACEMENTS)))
+
+# Leading scheme on input lines
+STRIP_SCHEME = re.compile(r'^https?://', re.IGNORECASE)
+
+# Page discovery only needs links and the sections that group them
+LINK_STRAINER = SoupStrainer(['footer', 'aside', 'nav', 'a'])
+KEYWORD_RE = re.compile(r'contact|about|team|support|impressum|privacy')
 
 
+def find_emails(text: str) -> list:
+    text = text.translate(OBFUSCATION_TABLE)
+    text = OBFUSCATED_DOT.sub('.', OBFUSCATED_AT.sub('@', text))
+    emails = []
+    for at in AT_RE.finditer(text):
+        i = at.start()
+        local = LOCAL_RE.search(text, max(0, i - 64), i)
+        if not local:
+            continue
+        # A local-part character just before the match means we only caught a
+        # suffix (non-ASCII letter or a local part longer than 64 chars)
+        start = local.start()
+        if start and (text[start - 1].isalnum() or text[start - 1] in LOCAL_PUNCT):
+            continue
+        domain = DOMAIN_RE.match(text, i + 1)
+        if domain:
+            emails.append(f"{local.group()}@{domain.group()}")
+    return emails
+
+
+@functools.lru_cache(maxsize=65536)
 def cleanup_email(email: str) -> str:
-    email = unquote(email)
-    return (email
-            .lower()
-            .replace('[at]', '@')
-            .replace('(at)', '@')
-            .replace(' at ', '@')
-            .replace(' à ', '@')
-            .replace('＠', '@')
-            .replace('&#64;', '@')
-            .replace('&#46;', '.')
-            .replace(' dot ', '.')
-            .replace('。', '.')
-            .replace('[dot]', '.')
-            .replace('(dot)', '.')
-            .replace(' ', '')
-            )
+    return CLEANUP_RE.sub(lambda m: CLEANUP_REPLACEMENTS[m.group(0)], unquote(email).lower())
+
+
+@functools.lru_cache(maxsize=65536)
+def _valid(email: str) -> bool:
+    try:
+        validate_email(email, check_deliverability=False)
+        return True
+    except Exception:
+        return False
+
+
+def _parse(html: str, parse_only=None) -> BeautifulSoup:
+    return BeautifulSoup(html, 'lxml', parse_only=parse_only)
+
+
+# Read at most MAX_BYTES of the body so one huge page can't hog a slot
+async def read_capped(resp) -> str:
+    body = bytearray()
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        body += chunk
+        if len(body) >= MAX_BYTES:
+            resp.close()
+            break
+    body = bytes(body[:MAX_BYTES])
+    try:
+        return body.decode(resp.charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class StatusError(aiohttp.ClientError):
+    # Non-200 response from the HEAD probe, as opposed to a connection failure
+    pass
+
+
+# Cheap HEAD probe so error pages, non-HTML and oversized bodies are never downloaded.
+# Error statuses raise like a failed GET; False means the page is definitely not worth fetching.
+async def head_ok(session, url: str) -> bool:
+    async with session.head(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as resp:
+        if resp.status in (405, 501):  # HEAD not supported, let the GET decide
+            return True
+        if resp.status != 200:
+            raise StatusError(f"Status {resp.status}")
+        content_type = resp.headers.get('content-type', '')
+        if content_type and 'html' not in content_type:
+            return False
+        return (resp.content_length or 0) <= MAX_BYTES
+
+
+class PlaywrightPool:
+    # One Chromium process for the whole run; each fetch gets a fresh context
+
+    def __init__(self, max_contexts: int):
+        self.semaphore = asyncio.Semaphore(max_contexts)
+        self.lock = asyncio.Lock()
+        self.playwright = None
+        self.browser = None
+        self.launch_error = None
+
+    async def start(self):
+        async with self.lock:
+            if self.launch_error is not None:
+                raise self.launch_error
+            if self.browser is None:
+                playwright = await async_playwright().start()
+                try:
+                    self.browser = await playwright.chromium.launch(headless=True)
+                except Exception as e:
+                    # Don't leave the driver running, and don't retry a launch that can't work
+                    await playwright.stop()
+                    self.launch_error = e
+                    raise
+                self.playwright = playwright
+
+    async def fetch(self, url: str, timeout_ms: int) -> str:
+        await self.start()
+        async with self.semaphore:
+            context = await self.browser.new_context(ignore_https_errors=True)
+            try:
+                page = await context.new_page()
+                await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+                return await page.content()
+            finally:
+                await context.close()
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.browser = self.playwright = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+playwright_pool = PlaywrightPool(PLAYWRIGHT_CONTEXTS)
+
+
+# Decode entities before cutting off ?subject=/#fragment, as BeautifulSoup did
+def mailto_targets(html: str) -> list:
+    targets = []
+    for m in MAILTO_RE.finditer(html):
+        value = unescape(m.group(1)).split('?', 1)[0].split('#', 1)[0]
+        targets.extend(unquote(t) for t in value.split(',') if t.strip())
+    return targets
+
+
+# Cheap shape check for mailto values: one '@' and a dotted domain
+def _looks_like_email(address: str) -> bool:
+    local, _, domain = address.partition('@')
+    return bool(local) and DOMAIN_RE.fullmatch(domain) is not None
+
+
+# Returns (text_emails, mailto_emails); mailto: hits are treated as confident
+def extract_emails(html: str):
+    # Drop comments and script/style bodies, which BeautifulSoup never returned,
+    # then strip tags and decode entities like get_text() would
+    html = SCRIPT_STYLE_RE.sub(' ', COMMENT_RE.sub(' ', html))
+    text = unescape(TAG_RE.sub(' ', html))
+    emails_text = set(map(cleanup_email, set(find_emails(text))))
+    mailto_all = set(map(cleanup_email, mailto_targets(html)))
+
+    # Only well-formed mailto values are confident; the rest get validated like text
+    emails_mailto = set(filter(_looks_like_email, mailto_all))
+    emails_text |= mailto_all - emails_mailto
+    return list(emails_text - emails_mailto), list(emails_mailto)
 
 
 async def fetch_emails_playwright(url: str, deep=False):
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(ignore_https_errors=True)
-            page = await context.new_page()
-            timeout_ms = (TIMEOUT * 1000) * (2 if deep else 1)
-            await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
-            html = await page.content()
-            await browser.close()
+        timeout_ms = (TIMEOUT * 1000) * (2 if deep else 1)
+        html = await playwright_pool.fetch(url, timeout_ms)
     except Exception as e:
         print(f"Playwright error fetching {url}: {e}")
-        return []
+        return [], []
 
-    soup = BeautifulSoup(html, 'html.parser')
-    emails_text = [match[0] or match[1] for match in EMAIL_PATTERN.findall(soup.get_text(separator=' '))]
-    emails_mailto = []
-    for a in soup.select('a[href^="mailto:" i]'):
-        href = a['href']
-        if 'mailto:' in href.lower():
-            email_part = href.split(':', 1)[-1].split('?')[0].split('#')[0]
-            decoded_email = unquote(email_part.strip())
-            emails_mailto.append(decoded_email)
-    return [cleanup_email(e) for e in set(emails_text + emails_mailto)]
+    return extract_emails(html)
 
 
 async def fetch_emails(session, url: str, deep=False):
@@ -80,33 +249,27 @@ async def fetch_emails(session, url: str, deep=False):
         return await fetch_emails_playwright(url, deep=True)
 
     try:
+        if not await head_ok(session, url):
+            return [], []  # Non-HTML or too large; Playwright won't help either
         async with session.get(url, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as response:
             if response.status != 200:
                 raise aiohttp.ClientError(f"Status {response.status}")
-            text = await response.text()
+            text = await read_capped(response)
     except Exception:
         return await fetch_emails_playwright(url)
 
-    soup = BeautifulSoup(text, 'html.parser')
-    emails_text = [match[0] or match[1] for match in EMAIL_PATTERN.findall(soup.get_text(separator=' '))]
-    emails_mailto = []
-    for a in soup.select('a[href^="mailto:" i]'):
-        href = a['href']
-        if 'mailto:' in href.lower():
-            email_part = href.split(':', 1)[-1].split('?')[0].split('#')[0]
-            decoded_email = unquote(email_part.strip())
-            emails_mailto.append(decoded_email)
-
-    return [cleanup_email(e) for e in set(emails_text + emails_mailto)]
+    return extract_emails(text)
 
 
 async def discover_relevant_pages(session, base_url: str):
     try:
+        if not await head_ok(session, base_url):
+            return []
         async with session.get(base_url, timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as response:
             if response.status != 200:
                 return []
-            text = await response.text()
-            soup = BeautifulSoup(text, 'html.parser')
+            text = await read_capped(response)
+            soup = _parse(text, parse_only=LINK_STRAINER)
 
             relevant_links = set()
             for tag in ['footer', 'aside', 'nav']:
@@ -118,14 +281,15 @@ async def discover_relevant_pages(session, base_url: str):
                             full_url = urljoin(base_url, href)
                             relevant_links.add(full_url)
 
-            keywords = ['contact', 'about', 'team', 'support', 'impressum', 'privacy']
             for a in soup.select('a[href]'):
                 href = a.get('href', '').strip().lower()
-                if any(k in href for k in keywords):
+                if KEYWORD_RE.search(href):
                     full_url = urljoin(base_url, href)
                     relevant_links.add(full_url)
 
             return list(relevant_links)[:10]  # limit to avoid too many
+    except StatusError:
+        return []  # Error status from the probe, same as a non-200 GET
     except Exception as e:
         print(f"Error discovering pages for {base_url}: {e}")
         return []
@@ -151,19 +315,22 @@ async def check_domain(session, domain: str, line_number: int, deep=False):
             if emails:
                 break
             for page in relevant_pages:
-                new_emails = await fetch_emails(session, page, deep=deep)
-                if new_emails:
-                    emails = list(set(emails + new_emails))
+                text_emails, mailto_emails = await fetch_emails(session, page, deep=deep)
+                if mailto_emails:
+                    # Confident hit: skip validating the mailto addresses and the remaining pages
+                    found = mailto_emails + [email for email in text_emails if _valid(email)]
+                    return {
+                        'line_number': line_number,
+                        'domain': domain,
+                        'emails': ', '.join(found),
+                        'target_website': page
+                    }
+                if text_emails:
+                    emails = list(set(emails + text_emails))
                     target_website = page
                     break
 
-    valid_emails = []
-    for email in set(emails):
-        try:
-            validate_email(email, check_deliverability=False)
-            valid_emails.append(email)
-        except:
-            pass
+    valid_emails = [email for email in set(emails) if _valid(email)]
 
     return {
         'line_number': line_number,
@@ -173,67 +340,143 @@ async def check_domain(session, domain: str, line_number: int, deep=False):
     }
 
 
+class PrewarmedResolver(AbstractResolver):
+    # Async (c-ares) resolver that also serves the connector from the pre-warm
+    # lookups, so live hosts aren't resolved a second time
+
+    def __init__(self):
+        self.resolver = aiohttp.AsyncResolver()
+        self.cache = {}
+
+    async def resolve(self, host, port=0, family=socket.AF_UNSPEC):
+        cached = self.cache.get((host, family))
+        if cached and time.monotonic() - cached[0] < DNS_CACHE_TTL:
+            return [dict(addr, port=port) for addr in cached[1]]
+        addrs = await self.resolver.resolve(host, port, family=family)
+        self.cache[(host, family)] = (time.monotonic(), addrs)
+        return addrs
+
+    async def close(self):
+        await self.resolver.close()
+
+
+def host_of(domain: str) -> str:
+    return urlsplit('//' + domain).hostname or ''
+
+
+DNS_NOT_FOUND = (aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA)
+
+
+async def find_unresolved_hosts(resolver, domains):
+    # Resolve every host once up front so dead domains are skipped before any request
+    sem = asyncio.Semaphore(DNS_CONCURRENCY)
+
+    async def resolves(host):
+        async with sem:
+            for _ in range(DNS_ATTEMPTS):
+                try:
+                    await resolver.resolve(host, 80, family=socket.AF_UNSPEC)
+                    return True
+                except OSError as e:
+                    # Only "no such host / no records" counts; timeouts, SERVFAIL
+                    # etc. are left to the real requests
+                    cause = e.__cause__
+                    if not (isinstance(cause, aiodns.error.DNSError) and cause.args
+                            and cause.args[0] in DNS_NOT_FOUND):
+                        return True
+                except ValueError:
+                    pass
+            return False
+
+    hosts = list({host_of(d) for d in domains} - {''})
+    resolved = await asyncio.gather(*(resolves(h) for h in hosts))
+    return {h for h, ok in zip(hosts, resolved) if not ok}
+
+
 async def main():
     # Read domains and preserve order + line numbers
     with open(DOMAINS_FILE, 'r', encoding='utf-8') as f:
-        domains = [(idx + 1, line.strip().replace('http://', '').replace('https://', '').split()[0])
+        domains = [(idx + 1, STRIP_SCHEME.sub('', line.strip(), count=1).split(None, 1)[0])
                    for idx, line in enumerate(f) if line.strip()]
 
     if not domains:
         print("No domains found in input file.")
         return
 
-    # Prepare output CSV with header
-    with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+    # Async (c-ares) DNS, shared by the pre-warm and the connector
+    resolver = PrewarmedResolver()
+    unresolved = await find_unresolved_hosts(resolver, [d for _, d in domains])
+    conn = aiohttp.TCPConnector(limit=CONCURRENCY_LIMIT, ssl=False, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                                resolver=resolver, ttl_dns_cache=DNS_CACHE_TTL)
+
+    # Log finished domains to a JSONL sidecar so a crashed run keeps its progress;
+    # the CSV itself is written once, in order, at the end
+    with open(PROGRESS_FILE, 'a', buffering=OUTPUT_BUFFER, encoding='utf-8') as progress:
+        async with aiohttp.ClientSession(connector=conn, headers=HEADERS,
+                                         timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+                                         read_bufsize=CHUNK_SIZE) as session, playwright_pool:
+
+            # Results are stored column-wise, indexed by line number - 1
+            size = domains[-1][0]
+            result_domains = [None] * size
+            result_emails = [None] * size
+            result_targets = [None] * size
+
+            # Domains that don't resolve are recorded without any request
+            for line_no, domain in domains:
+                if host_of(domain) in unresolved:
+                    result_domains[line_no - 1] = domain
+                    result_emails[line_no - 1] = 'Not found'
+                    result_targets[line_no - 1] = ''
+                    progress.write(json.dumps({'line_number': line_no, 'domain': domain,
+                                               'emails': 'Not found', 'target_website': ''}) + '\n')
+
+            # PASS 1: Normal scraping
+            tasks = [check_domain(session, domain, line_no) for line_no, domain in domains
+                     if host_of(domain) not in unresolved]
+            for done, future in enumerate(tqdm_asyncio.as_completed(tasks, desc='Pass 1: Processing domains'), 1):
+                result = await future
+                i = result['line_number'] - 1
+                result_domains[i] = result['domain']
+                result_emails[i] = result['emails']
+                result_targets[i] = result['target_website']
+
+                progress.write(json.dumps(result) + '\n')
+                if done % FLUSH_EVERY == 0:
+                    progress.flush()
+            progress.flush()
+
+            # PASS 2: Deep retry only for "Not found"
+            to_retry = [(line_no, domain) for line_no, domain in domains
+                        if result_emails[line_no - 1] == 'Not found']
+            if to_retry:
+                print(f"\nRetrying {len(to_retry)} domains with deep mode (Playwright)...\n")
+                retry_tasks = [check_domain(session, result_domains[line_no - 1], line_no, deep=True)
+                               for line_no, _ in to_retry]
+                for future in tqdm_asyncio.as_completed(retry_tasks, desc='Pass 2: Deep retry'):
+                    new_result = await future
+
+                    # Only replace the Pass 1 row when deep mode found emails
+                    if new_result['emails'] != 'Not found':
+                        i = new_result['line_number'] - 1
+                        result_emails[i] = new_result['emails']
+                        result_targets[i] = new_result['target_website']
+                        progress.write(json.dumps(new_result) + '\n')
+
+    # The connector only closes resolvers it created itself
+    await resolver.close()
+
+    # Rows are already in input order; write the CSV in one pass
+    with open(OUTPUT_FILE, 'w', buffering=OUTPUT_BUFFER, newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['domain', 'emails', 'target_website'])
+        writer.writerows(row for row in zip(result_domains, result_emails, result_targets)
+                         if row[0] is not None)
 
-    conn = aiohttp.TCPConnector(limit=CONCURRENCY_LIMIT, ssl=False)
-    async with aiohttp.ClientSession(connector=conn, headers=HEADERS,
-                                     timeout=aiohttp.ClientTimeout(total=TIMEOUT)) as session:
-
-        # PASS 1: Normal scraping
-        tasks = [check_domain(session, domain, line_no) for line_no, domain in domains]
-        results_pass1 = []
-        for future in tqdm_asyncio.as_completed(tasks, desc='Pass 1: Processing domains'):
-            result = await future
-            results_pass1.append(result)
-
-            # Continuously append to CSV
-            with open(OUTPUT_FILE, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([result['domain'], result['emails'], result['target_website']])
-
-        # PASS 2: Deep retry only for "Not found"
-        to_retry = [r for r in results_pass1 if r['emails'] == 'Not found']
-        if to_retry:
-            print(f"\nRetrying {len(to_retry)} domains with deep mode (Playwright)...\n")
-            retry_tasks = [check_domain(session, r['domain'], r['line_number'], deep=True) for r in to_retry]
-            for future in tqdm_asyncio.as_completed(retry_tasks, desc='Pass 2: Deep retry'):
-                new_result = await future
-
-                # Update the CSV row (we overwrite the entire file with updated data to keep order)
-                # Instead, we re-write all rows in correct order after Pass 2
-                pass
-
-        # Final step: Re-write entire CSV in exact original input order with updated results
-        final_results = {r['line_number']: r for r in results_pass1}
-        for r in to_retry:
-            # Update if deep mode found emails
-            deep_result = await check_domain(session, r['domain'], r['line_number'], deep=True)  # already done above, but we merge
-            if deep_result['emails'] != 'Not found':
-                final_results[deep_result['line_number']] = deep_result
-
-        # Sort by original line number and write final clean CSV
-        sorted_final = sorted(final_results.values(), key=lambda x: x['line_number'])
-        with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['domain', 'emails', 'target_website'])
-            for r in sorted_final:
-                writer.writerow([r['domain'], r['emails'], r['target_website']])
-
-        print(f"\nDone! Results saved to {OUTPUT_FILE} in exact input order.")
+    print(f"\nDone! Results saved to {OUTPUT_FILE} in exact input order.")
 
 
 if __name__ == '__main__':
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())